@@ -1,5 +1,13 @@
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
 import streamlit as st
-from langchain_community.retrievers import WikipediaRetriever
+import tiktoken
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
@@ -8,9 +16,22 @@ from langchain_core.output_parsers import StrOutputParser
 # CONFIGURATION and CONSTANTS
 # ======================================================
 TEMPERATURE = 0.2   
-MAX_TOKENS = 700 # cap the model output length 
+MAX_TOKENS = 800 # cap the model output length; ~450 words + citations is ~650 tokens, the REPORT_END stop ends decoding earlier
+REPORT_END = "<<<END>>>" # sentinel the model emits when done; used as a stop sequence
 TOP_K_WIKI = 5 # retrieve top 5 relevant Wikipedia pages
-MAX_CHARS_PER_DOC = 6000 # Limit each document to control prompt length and reduce noise.
+MAX_TOKENS_PER_DOC = 1500 # Limit each document (~7.5K prompt tokens over 5 docs) to control prompt length and reduce noise.
+TOKENIZER_MODEL = "gpt-4o" # gpt-4o-mini shares the gpt-4o tokenizer
+DEDUP_SHINGLE_SIZE = 5 # word n-gram size used to detect repeated sentences across pages
+DEDUP_MAX_OVERLAP = 0.8 # drop a sentence when this share of its n-grams was already sent
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+REPORT_CACHE_TTL = 24 * 3600 # keep each generated report for one day
+REPORT_CACHE_MAX_ENTRIES = 500 # cap on cached reports; oldest are evicted first
+WIKI_CACHE_TTL = 7 * 24 * 3600 # Wikipedia changes slowly; reuse retrieved pages within one-week windows
+WIKI_CACHE_MAX_ENTRIES = 200 # cap on cached queries, so old windows don't pile up
+MAX_INDUSTRIES = 5 # max industries researched in one run
+MAX_LLM_CONCURRENCY = 8 # parallel report requests, kept low to respect OpenAI rate limits
+WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKI_HEADERS = {"User-Agent": "MarketResearchAssistant/1.0 (Streamlit app)"} # Wikipedia API asks for a descriptive UA
 
 # ======================================================
 # Page config
@@ -46,51 +67,302 @@ model_name = st.sidebar.selectbox(
     index=0
 )
 
-# Text field for entering API key 
-api_key = st.sidebar.text_input(
-    "Enter OpenAI API Key",
-    type="password",
-    help="Your key will not be stored permanently."
-)
+# Prefer a key configured in .streamlit/secrets.toml
+try:
+    secret_api_key = st.secrets.get("OPENAI_API_KEY")
+except Exception: # No secrets file configured
+    secret_api_key = None
+
+if secret_api_key:
+    st.sidebar.caption("Using the OpenAI API key from app secrets.")
+    api_key_input = ""
+else:
+    # Text field for entering API key (only committed when Generate is clicked)
+    api_key_input = st.sidebar.text_input(
+        "Enter OpenAI API Key",
+        type="password",
+        help="Your key will not be stored permanently."
+    )
 
 # ======================================================
 # HELPER FUNCTIONS
 # ======================================================
 
-# Retrieve the top 5 most relevant Wikipedia pages 
-def get_wikipedia_content(industry_query):
+# Split the comma-separated input into industry names
+def parse_industries(text):
     """
-    Top 5 relevant Wikipedia pages.
+    Unique, non-empty industry names (case-insensitive), at most MAX_INDUSTRIES.
     """
-    retriever = WikipediaRetriever(top_k_results=TOP_K_WIKI)
-    docs = retriever.invoke(industry_query)
-    return docs
-
-# Generate the final industry report using the LLM 
-def generate_industry_report(industry, context_text, api_key, model):
+    industries = []
+    seen = set()
+    for part in text.split(","):
+        name = part.strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            industries.append(name)
+    return industries[:MAX_INDUSTRIES]
+
+# Reuse one LLM client (and its HTTP connection pool) across reruns
+@st.cache_resource(show_spinner=False)
+def get_llm(model, api_key, temperature, max_tokens):
     """
-    Generate report < 500 words using LLM.
+    Cached ChatOpenAI client, one per (model, api_key, temperature, max_tokens).
+    Decoding stops as soon as the model emits REPORT_END.
     """
-    llm = ChatOpenAI(
+    return ChatOpenAI(
         model=model,
-        temperature=TEMPERATURE,
+        temperature=temperature,
         openai_api_key=api_key,
-        max_tokens=MAX_TOKENS
+        max_tokens=max_tokens,
+        stop=[REPORT_END]
     )
 
-    # System-level instructions:
-    system_msg = (
-        "You are a professional market research analyst writing a concise industry briefing for a business analyst at a large corporation. "
-        "CRITICAL EVIDENCE RULE: Use ONLY the provided Wikipedia extracts. "
-        "Do not refer to the task, the prompt, or the extracts (avoid phrases like 'the extracts provided' or 'the text does not cover'). "
-        "Write in a decision-relevant, analytical tone (not an encyclopedia style). No bullet points."
-        "Synthesize information across multiple extracts and ensure every analytical claim is cited."
-    )
+# One long-lived event loop, so the cached LLM's async HTTP pool stays bound to a single loop
+@st.cache_resource(show_spinner=False)
+def get_event_loop():
+    """
+    Event loop running forever on a daemon thread.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+# Run a coroutine on the shared loop and wait for its result
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+# Search Wikipedia once for the titles of the top-k pages
+async def _search_titles(session, query, top_k):
+    params = {
+        "action": "query",
+        "list": "search",
+        "srsearch": query,
+        "srlimit": top_k,
+        "format": "json",
+    }
+    async with session.get(WIKI_API_URL, params=params) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+    return [hit["title"] for hit in data.get("query", {}).get("search", [])]
+
+# Fetch one page's plain-text extract + canonical URL
+async def _fetch_page(session, title):
+    params = {
+        "action": "query",
+        "prop": "extracts|info",
+        "explaintext": 1,
+        "inprop": "url",
+        "redirects": 1,
+        "titles": title,
+        "format": "json",
+        "formatversion": 2,
+    }
+    async with session.get(WIKI_API_URL, params=params) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+    pages = data.get("query", {}).get("pages", [])
+    if not pages or pages[0].get("missing"):
+        return None
+    page = pages[0]
+    # Plain dict so results pickle cleanly into the disk cache
+    return {
+        "title": page.get("title", title),
+        "url": page.get("fullurl"),
+        "content": page.get("extract", ""),
+    }
+
+# Search, then fetch all pages concurrently under one HTTP session
+async def _fetch_wikipedia_docs(industry_query, top_k):
+    async with aiohttp.ClientSession(headers=WIKI_HEADERS) as session:
+        titles = await _search_titles(session, industry_query, top_k)
+        pages = await asyncio.gather(*[_fetch_page(session, t) for t in titles]) # results keep search-rank order
+    return [page for page in pages if page is not None]
+
+# Disk-cached retrieval. Streamlit ignores ttl when persist="disk" is set, so expiry comes
+# from cache_window instead: a new window means a new cache key and a fresh fetch.
+# Raises LookupError when nothing is found, since exceptions are not cached.
+@st.cache_data(persist="disk", max_entries=WIKI_CACHE_MAX_ENTRIES, show_spinner=False)
+def _get_wikipedia_content_cached(industry_query: str, cache_window: int):
+    docs = asyncio.run(_fetch_wikipedia_docs(industry_query, TOP_K_WIKI))
+    if not docs:
+        raise LookupError(f"No Wikipedia pages found for {industry_query!r}")
+    return docs
 
-    # User-level instructions:
-    user_msg = f"""
-Write a concise and structured industry overview for: {industry}
+# Retrieve the top 5 most relevant Wikipedia pages (cached on disk across restarts)
+def get_wikipedia_content(industry_query: str):
+    """
+    Top 5 relevant Wikipedia pages, fetched in parallel, as dicts with title/url/content.
+    Pass a normalized query so equivalent inputs share one cache entry.
+    Results are reused until the current WIKI_CACHE_TTL window ends.
+    """
+    cache_window = int(time.time() // WIKI_CACHE_TTL)
+    try:
+        return _get_wikipedia_content_cached(industry_query, cache_window)
+    except LookupError:
+        return [] # Empty results are not cached, so the next attempt searches again
+
+# Background workers for speculative retrieval while the user is still on Step 1
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor():
+    return ThreadPoolExecutor(max_workers=MAX_INDUSTRIES, thread_name_prefix="wiki-prefetch")
+
+# In-flight prefetches, shared across reruns (module globals are reset on every rerun)
+@st.cache_resource(show_spinner=False)
+def get_prefetch_store():
+    """
+    Futures of get_wikipedia_content keyed by normalized query, plus the lock guarding
+    them (the dict is shared by every session's script thread).
+    """
+    return {}, threading.Lock()
+
+# on_change callback for the industry input: start retrieval before Generate is clicked
+def _prefetch():
+    store, lock = get_prefetch_store()
+    executor = get_prefetch_executor()
+    with lock:
+        # Finished prefetches already live in the st.cache_data cache, so only in-flight ones are kept
+        for query in [query for query, future in store.items() if future.done()]:
+            del store[query]
+        for industry in parse_industries(st.session_state.industry_input):
+            query = industry.lower().strip()
+            if query not in store:
+                store[query] = executor.submit(get_wikipedia_content, query)
+
+# Retrieval entry point for Step 2
+def fetch_wikipedia_content(industry_query):
+    """
+    Wait on a matching prefetch if one is still running, otherwise call get_wikipedia_content
+    (which returns instantly if a finished prefetch already cached the query).
+    """
+    store, lock = get_prefetch_store()
+    with lock:
+        future = store.pop(industry_query, None)
+    if future is not None:
+        try:
+            return future.result()
+        except Exception:
+            pass # Prefetch failed; retry in the foreground so the error surfaces in the UI
+    return get_wikipedia_content(industry_query)
+
+# Load the tokenizer once, not on every rerun
+@st.cache_resource(show_spinner=False)
+def get_encoding():
+    """
+    Cached tiktoken encoding used to budget prompt tokens.
+    """
+    return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+
+# Cut text at a token boundary rather than a character count
+def truncate_to_tokens(text, max_tokens):
+    """
+    First max_tokens tokens of text, decoded back to a string.
+    """
+    enc = get_encoding()
+    ids = enc.encode(text)
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens])
+
+# Word 5-gram hashes of a sentence, used to spot repeats across pages
+def sentence_shingles(sentence):
+    words = re.findall(r"\w+", sentence.lower())
+    n = DEDUP_SHINGLE_SIZE
+    return {hash(tuple(words[i:i + n])) for i in range(max(1, len(words) - n + 1))} if words else set()
+
+# Fill one page's token budget with sentences not already sent from earlier pages
+def dedupe_and_truncate(text, seen_shingles, max_tokens):
+    """
+    Keep sentences in order until about max_tokens tokens are used, skipping any whose
+    5-grams mostly (>= DEDUP_MAX_OVERLAP) appear in seen_shingles. Only kept (sent) text
+    is added to seen_shingles, so later pages never lose sentences the model didn't see.
+    Line and paragraph breaks are preserved.
+    """
+    enc = get_encoding()
+    kept_lines = []
+    used_tokens = 0
+    for line in text.splitlines():
+        # Keep paragraph breaks, but don't stack blank lines left by dropped paragraphs
+        if not line.strip():
+            if kept_lines and kept_lines[-1]:
+                kept_lines.append("")
+            continue
+        kept = []
+        for sentence in SENTENCE_SPLIT.split(line):
+            shingles = sentence_shingles(sentence)
+            if not shingles or len(shingles & seen_shingles) >= DEDUP_MAX_OVERLAP * len(shingles):
+                continue
+            sentence_tokens = len(enc.encode(sentence)) + 1 # +1 for the joining space/newline
+            if used_tokens + sentence_tokens > max_tokens:
+                # Budget reached: keep whatever part of this sentence still fits, then stop
+                partial = truncate_to_tokens(sentence, max(max_tokens - used_tokens - 1, 0))
+                if partial:
+                    seen_shingles |= sentence_shingles(partial)
+                    kept.append(partial)
+                if kept:
+                    kept_lines.append(" ".join(kept))
+                return "\n".join(kept_lines).strip()
+            used_tokens += sentence_tokens
+            seen_shingles |= shingles
+            kept.append(sentence)
+        if kept:
+            kept_lines.append(" ".join(kept))
+    return "\n".join(kept_lines).strip()
+
+# Shared store of finished reports, so repeated queries skip the LLM call
+@st.cache_resource(show_spinner=False)
+def get_report_cache():
+    """
+    (created_at, report text) pairs keyed by report_cache_key(), oldest first, plus the lock
+    guarding them (the dict is shared by every session's script thread).
+    Each entry expires on its own after REPORT_CACHE_TTL; see get_cached_report().
+    """
+    return {}, threading.Lock()
+
+# Look up a cached report, dropping it once it is older than REPORT_CACHE_TTL
+def get_cached_report(cache_key):
+    report_cache, lock = get_report_cache()
+    with lock:
+        entry = report_cache.get(cache_key)
+        if entry is None:
+            return None
+        created_at, text = entry
+        if time.time() - created_at > REPORT_CACHE_TTL:
+            del report_cache[cache_key]
+            return None
+        return text
+
+# Store a finished report with its creation time, sweeping expired and excess entries
+def put_cached_report(cache_key, text):
+    report_cache, lock = get_report_cache()
+    now = time.time()
+    with lock:
+        # Re-insert so the dict stays ordered by creation time
+        report_cache.pop(cache_key, None)
+        report_cache[cache_key] = (now, text)
+        for key in list(report_cache):
+            created_at, _ = report_cache[key]
+            if now - created_at <= REPORT_CACHE_TTL and len(report_cache) <= REPORT_CACHE_MAX_ENTRIES:
+                break
+            del report_cache[key]
+
+def report_cache_key(industry, model, context_text):
+    """
+    Normalized industry + model + sha256 of the context (not the raw ~30KB text).
+    """
+    context_digest = hashlib.sha256(context_text.encode("utf-8")).hexdigest()
+    return (industry.lower().strip(), model, context_digest)
+
+# System-level instructions (shared by every report):
+SYSTEM_MSG = (
+    "You are a professional market research analyst writing a concise industry briefing for a business analyst at a large corporation. "
+    "CRITICAL EVIDENCE RULE: Use ONLY the provided Wikipedia extracts. "
+    "Do not refer to the task, the prompt, or the extracts (avoid phrases like 'the extracts provided' or 'the text does not cover'). "
+    "Write in a decision-relevant, analytical tone (not an encyclopedia style). No bullet points."
+    "Synthesize information across multiple extracts and ensure every analytical claim is cited."
+)
 
+# Per-report rules, applied to every briefing:
+REPORT_CONSTRAINTS = """
 ABSOLUTE CONSTRAINTS (Zero Tolerance for Deviation):
 - Length: 420–450 words (MUST be < 450).
 - Structure: EXACTLY 4 long, analytical paragraphs. No headings. No bullet points.
@@ -113,18 +385,72 @@ PARAGRAPH PLAN (write exactly these 4 paragraphs):
 
 STYLE (secondary):
 - No generic conclusion (avoid “In conclusion/Overall…”).
+""".strip()
+
+# Build the system + user messages for one industry report
+def build_report_messages(industry, context_text):
+    # User-level instructions:
+    user_msg = f"""
+Write a concise and structured industry overview for: {industry}
+
+{REPORT_CONSTRAINTS}
 
 Wikipedia extracts:
 {context_text}
+
+When finished, output {REPORT_END} on its own line.
 """.strip()
-    
-# Send system + user prompts to the LLM and extract the generated text output.
-    report = llm.invoke([
-        {"role": "system", "content": system_msg},
+
+    return [
+        {"role": "system", "content": SYSTEM_MSG},
         {"role": "user", "content": user_msg}
-    ]).content
+    ]
+
+# Remove the end sentinel if it appears anyway (the stop sequence normally keeps it out of the output)
+def strip_report_end(text):
+    return text.replace(REPORT_END, "").strip()
 
-    return report # Return the final report
+# Generate the final industry report using the LLM 
+def generate_industry_report(industry, context_text, api_key, model, stream_info):
+    """
+    Stream report < 500 words from the LLM, yielding text chunks as they arrive.
+    The finish reason of the stream is written to stream_info["finish_reason"].
+    """
+    llm = get_llm(model, api_key, TEMPERATURE, MAX_TOKENS)
+
+# Send system + user prompts to the LLM and yield the generated text as it streams in.
+    for chunk in llm.stream(build_report_messages(industry, context_text)):
+        # Only the final chunk carries the finish reason
+        finish_reason = chunk.response_metadata.get("finish_reason")
+        if finish_reason:
+            stream_info["finish_reason"] = finish_reason
+        yield chunk.content
+
+# Generate several industry reports concurrently.
+# This replaces packing all industries into one prompt (split on a separator): separate calls
+# keep each report within its own max_tokens, isolate failures, and decode in parallel.
+def generate_reports_concurrently(industries, context_texts, api_key, model):
+    """
+    One independent LLM call per industry, run in parallel (at most MAX_LLM_CONCURRENCY at once).
+    Returns one (report, finish_reason) pair per industry, in order, or the exception
+    for an industry whose call failed, so one failure doesn't discard the other reports.
+    """
+    llm = get_llm(model, api_key, TEMPERATURE, MAX_TOKENS)
+    inputs = [
+        build_report_messages(industry, context_text)
+        for industry, context_text in zip(industries, context_texts)
+    ]
+    # abatch limits in-flight requests with a semaphore sized by max_concurrency
+    results = run_async(llm.abatch(
+        inputs,
+        config={"max_concurrency": MAX_LLM_CONCURRENCY},
+        return_exceptions=True
+    ))
+    return [
+        result if isinstance(result, Exception)
+        else (strip_report_end(result.content), result.response_metadata.get("finish_reason"))
+        for result in results
+    ]
 
 # ======================================================
 # MAIN APP LOGIC
@@ -135,47 +461,66 @@ def init_state():
     # Track which step the user is currently in (1=input, 2=retrieval, 3=report)
     if "steps" not in st.session_state:
         st.session_state.steps = 1
-    # Store retrieved Wikipedia documents
+    # Store retrieved Wikipedia documents per industry
     if "docs" not in st.session_state:
         st.session_state.docs = None
-    # Store the user’s industry input
-    if "industry" not in st.session_state:
-        st.session_state.industry = ""
-    # Store concatenated Wikipedia context used for generation
+    # Live value of the industry text box (bound via its widget key)
+    if "industry_input" not in st.session_state:
+        st.session_state.industry_input = ""
+    # Store the parsed list of industries being researched
+    if "industries" not in st.session_state:
+        st.session_state.industries = []
+    # Store concatenated Wikipedia context used for generation, per industry
     if "wiki_context" not in st.session_state:
-        st.session_state.wiki_context = ""
+        st.session_state.wiki_context = {}
+    # Store rendered source links so reruns don't rebuild them, per industry
+    if "sources_md" not in st.session_state:
+        st.session_state.sources_md = {}
+    # Store generated reports, per industry
+    if "report_text" not in st.session_state:
+        st.session_state.report_text = {}
+    # Industries whose report was cut off at MAX_TOKENS
+    if "truncated_reports" not in st.session_state:
+        st.session_state.truncated_reports = set()
 
 init_state()
 
 # STEP 1: INPUT (Q1)
 st.header("Industry Selection")
 
-# Initialize input with session state value
+# Input value lives in session state under its key; on_change prefetches pages before Generate
 industry_input = st.text_input(
-    "Enter an industry to research (e.g., 'Electric Vehicles'):", 
-    value=st.session_state.industry
+    f"Enter one or more industries to research, comma-separated (up to {MAX_INDUSTRIES}, e.g., 'Electric Vehicles, Solar Power'):", 
+    key="industry_input",
+    on_change=_prefetch
 )
 
 # Check if industry is provided
 if st.button("Generate"):
+    industries = parse_industries(industry_input)
     # Validate API key before proceeding
-    if not api_key:
+    if not (secret_api_key or api_key_input.strip()):
         st.error("Please enter your API Key in the sidebar first.")
     # Prevent empty industry queries
-    elif not industry_input.strip():
+    elif not industries:
         st.warning("Please enter a industry name.") 
     else:
-        st.session_state.industry = industry_input
+        st.session_state["_committed_key"] = api_key_input.strip()
+        st.session_state.industries = industries
         st.session_state.steps = 2 # Move workflow to retrieval stage
         # Reset previous retrieval and report state
         st.session_state.docs = None  
-        st.session_state.wiki_context = "" 
-        # Clear old report if it exists
-        if "report_text" in st.session_state:
-            st.session_state.report_text = None
-            del st.session_state["report_text"] 
+        st.session_state.wiki_context = {} 
+        st.session_state.sources_md = {}
+        # Clear old reports
+        st.session_state.report_text = {}
+        st.session_state.truncated_reports = set()
         st.rerun() # Force Streamlit rerun
 
+# Key used for LLM calls: only changes on Generate, so typing in the sidebar
+# doesn't invalidate the cached get_llm client
+api_key = secret_api_key or st.session_state.get("_committed_key")
+
 # STEP 2: RETRIEVAL (Q2)
 st.divider()
 st.header("Data Retrieval")
@@ -187,18 +532,26 @@ else:
     
     if st.session_state.docs is None: # Only trigger retrieval if documents are not already cached in session
         # Display progress status while querying Wikipedia
-        with st.status(f"Searching Wikipedia for: {st.session_state.industry}...", expanded=True) as status:
+        with st.status(f"Searching Wikipedia for: {', '.join(st.session_state.industries)}...", expanded=True) as status:
             try:
-                raw_docs = get_wikipedia_content(st.session_state.industry)  # Call retriever function
-
-                # Handle case where no relevant pages are returned
-                if not raw_docs:
+                docs = {}
+                for industry in st.session_state.industries:
+                    raw_docs = fetch_wikipedia_content(industry.lower().strip())  # Call retriever function
+                    # Skip industries with no relevant pages
+                    if raw_docs:
+                        docs[industry] = raw_docs[:TOP_K_WIKI] # Keep top-k documents
+                    else:
+                        st.warning(f"No relevant Wikipedia pages found for '{industry}'; it will be skipped.")
+
+                # Handle case where no relevant pages are returned at all
+                if not docs:
                     status.update(label="No relevant Wikipedia pages found.", state="error", expanded=True)
                     st.error("No relevant Wikipedia pages found. Please try a different industry.")
                     st.stop()
 
-                # Cache top-k documents in session state
-                st.session_state.docs = raw_docs[:TOP_K_WIKI]
+                # Cache documents in session state
+                st.session_state.docs = docs
+                st.session_state.industries = list(docs)
                 status.update(label="Data Retrieval Complete!", state="complete", expanded=False) # Mark retrieval as complete in UI
             except Exception as e:
                 # Catch unexpected runtime errors
@@ -208,36 +561,48 @@ else:
     
     # Display retrieved sources
     if st.session_state.docs:
-        num_docs = len(st.session_state.docs) # Count how many pages were retrieved
-        
-        # Show warning if fewer than expected sources were found
-        if num_docs < TOP_K_WIKI:
-            st.warning(
-                f"Only {num_docs} relevant Wikipedia pages were found. "
-                "The report will be generated based on the available pages."
-            )
-        else:
-            # Confirm successful retrieval
-            st.success(f"Found {num_docs} relevant Wikipedia pages.")
-
-        # Build context string that will later be passed to the LLM
-        wiki_context = ""
-        for i, doc in enumerate(st.session_state.docs):
-            source_url = doc.metadata.get("source") # Extract metadata for display and citation
-            title = doc.metadata.get("title", "No Title")
-            
-            # Fallback: construct URL manually if metadata is missing
-            if not source_url:
-                safe_title = title.replace(" ", "_")
-                source_url = f"https://en.wikipedia.org/wiki/{safe_title}"
+        multiple = len(st.session_state.industries) > 1
+        for industry in st.session_state.industries:
+            industry_docs = st.session_state.docs[industry]
+            num_docs = len(industry_docs) # Count how many pages were retrieved
+            if multiple:
+                st.subheader(industry)
             
-            st.markdown(f"**{i+1}. [{title}]({source_url})**") # Display clickable source link in UI
-            
-            # Truncate content 
-            clean_content = (doc.page_content or "")[:MAX_CHARS_PER_DOC]
-            wiki_context += f"Source: {source_url}\nContent: {clean_content}\n\n"
-        
-        st.session_state.wiki_context = wiki_context
+            # Show warning if fewer than expected sources were found
+            if num_docs < TOP_K_WIKI:
+                st.warning(
+                    f"Only {num_docs} relevant Wikipedia pages were found. "
+                    "The report will be generated based on the available pages."
+                )
+            else:
+                # Confirm successful retrieval
+                st.success(f"Found {num_docs} relevant Wikipedia pages.")
+
+            # Build context string that will later be passed to the LLM
+            # Only once per retrieval: later reruns (sidebar/widget changes) reuse the session copy
+            if industry not in st.session_state.wiki_context:
+                context_parts = []
+                source_links = []
+                seen_shingles = set() # shared across this industry's pages for deduplication
+                for i, doc in enumerate(industry_docs):
+                    source_url = doc.get("url") # Extract metadata for display and citation
+                    title = doc.get("title") or "No Title"
+                    
+                    # Fallback: construct URL manually if metadata is missing
+                    if not source_url:
+                        safe_title = title.replace(" ", "_")
+                        source_url = f"https://en.wikipedia.org/wiki/{safe_title}"
+                    
+                    source_links.append(f"**{i+1}. [{title}]({source_url})**") # Clickable source link for the UI
+                    
+                    # Deduplicate against earlier pages while filling this page's token budget
+                    clean_content = dedupe_and_truncate(doc.get("content") or "", seen_shingles, MAX_TOKENS_PER_DOC)
+                    context_parts.append(f"Source: {source_url}\nContent: {clean_content}\n\n")
+                
+                st.session_state.wiki_context[industry] = "".join(context_parts) # Join once instead of re-copying the string per doc
+                st.session_state.sources_md[industry] = "\n\n".join(source_links)
+
+            st.markdown(st.session_state.sources_md[industry]) # Display source links in UI
 
     # If we successfully retrieved docs, we can move to report generation
     # If not, stop here, no point calling the LLM with empty context
@@ -256,22 +621,87 @@ if st.session_state.steps < 3:
     st.caption("Report will appear here after sources are retrieved.")
 else:
     #only generate once per run
-    # If user clicks Generate again, delete report_text in Step 1 so this block runs again.
-    if not st.session_state.get("report_text"):
-        with st.spinner("Generating report..."):
+    # If user clicks Generate again, report_text is reset in Step 1 so this block runs again.
+    industries = st.session_state.industries
+    reports = st.session_state.report_text
+    cache_keys = {
+        industry: report_cache_key(industry, model_name, st.session_state.wiki_context[industry])
+        for industry in industries
+    }
+
+    # Same industry + model + sources already answered: reuse the report without calling the LLM
+    for industry in industries:
+        if not reports.get(industry):
+            cached_report = get_cached_report(cache_keys[industry])
+            if cached_report:
+                reports[industry] = cached_report
+
+    pending = [industry for industry in industries if not reports.get(industry)]
+    errors = {} # per-industry failures from the parallel run; those industries are retried on the next rerun
+
+    # Several reports missing: generate them in parallel
+    if len(pending) > 1:
+        with st.spinner(f"Generating {len(pending)} reports..."):
             try:
-                 # Call the LLM using the user’s industry + the formatted wiki_context
-                st.session_state.report_text = generate_industry_report(
-                    st.session_state.industry,
-                    st.session_state.wiki_context,
+                batch = generate_reports_concurrently(
+                    pending,
+                    [st.session_state.wiki_context[industry] for industry in pending],
                     api_key,
                     model_name
                 )
+                for industry, result in zip(pending, batch):
+                    if isinstance(result, Exception):
+                        errors[industry] = result
+                        continue
+                    text, finish_reason = result
+                    reports[industry] = text
+                    # Only cache complete, non-empty reports (not ones cut off at MAX_TOKENS)
+                    if finish_reason == "length":
+                        st.session_state.truncated_reports.add(industry)
+                    elif text:
+                        put_cached_report(cache_keys[industry], text)
             except Exception as e:
-                # If the LLM call fails, show the error and keep report_text empty
+                # If the whole run fails, show the error and leave those reports empty
+                st.error(f"Error generating reports: {e}")
+
+    for industry in industries:
+        if len(industries) > 1:
+            st.subheader(industry)
+
+        # Cached or previously generated report: display it instead of calling the LLM again
+        if reports.get(industry):
+            st.write(reports[industry])
+            if industry in st.session_state.truncated_reports:
+                st.warning("This report hit the length limit and may be cut off. Click Generate to try again.")
+
+        # A single missing report: stream it into the page as tokens arrive
+        elif len(pending) == 1:
+            try:
+                stream_info = {}
+                # write_stream returns the full text once the stream ends
+                reports[industry] = strip_report_end(st.write_stream(
+                    generate_industry_report(
+                        industry,
+                        st.session_state.wiki_context[industry],
+                        api_key,
+                        model_name,
+                        stream_info
+                    )
+                ))
+                # Only cache complete, non-empty reports (not ones cut off at MAX_TOKENS)
+                if stream_info.get("finish_reason") == "length":
+                    st.session_state.truncated_reports.add(industry)
+                    st.warning("This report hit the length limit and may be cut off. Click Generate to try again.")
+                elif reports[industry]:
+                    put_cached_report(cache_keys[industry], reports[industry])
+            except Exception as e:
+                # If the LLM call fails, show the error and keep the report empty
                 st.error(f"Error generating report: {e}")
-                st.session_state.report_text = ""
+                reports[industry] = ""
+
+        # This industry's call failed while the others succeeded
+        elif industry in errors:
+            st.error(f"Error generating report: {errors[industry]}")
 
-    # Only display whenactually have text
-    if st.session_state.get("report_text"):
-        st.write(st.session_state.report_text)
\ No newline at end of file
+        else:
+            st.caption("No report was generated for this industry.")